@@ -9,9 +9,12 @@ import re
 import time
 import json
 import logging
+import shutil
 from pathlib import Path
 from datetime import datetime
+from collections import defaultdict
 from difflib import SequenceMatcher
+from functools import lru_cache
 from typing import Optional
 from storage import HotelStorage
 
@@ -21,14 +24,26 @@ try:
 except:
     pass
 
+try:
+    from rapidfuzz import fuzz, process as fuzz_process
+except ImportError:
+    fuzz_process = None  # 없으면 difflib.SequenceMatcher 사용
+
 from telegram import Bot
+from telegram.error import RetryAfter
+from telegram.request import HTTPXRequest
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
+from selenium.common.exceptions import (
+    NoSuchElementException,
+    StaleElementReferenceException,
+    TimeoutException,
+)
 
 # --- [설정] ---
 logging.basicConfig(level=logging.INFO, format='%(message)s')
@@ -37,6 +52,19 @@ logger = logging.getLogger(__name__)
 PRICE_HISTORY_FILE = "data/price_history.json"
 AMEX_LIST_URL = "https://www.americanexpress.com/en-us/travel/discover/property-results/dt/2/d/South%20Korea?ref=search&intlink=US-travel-discover-subnavSearch-location-South%20Korea"
 MAXFHR_KOREA_URL = "https://maxfhr.com/?programs=FHR&q=South+Korea&search_type=COUNTRY"
+MAXFHR_CARD_SELECTOR = "div.chakra-card"
+AMEX_CARD_SELECTOR = "div.card, div.hotel-card"
+PAGE_WAIT_TIMEOUT = 15    # 카드 렌더링 대기 상한 (초)
+SCROLL_WAIT_TIMEOUT = 3   # 스크롤 후 lazy-load 추가분 대기 상한 (초)
+# 카드 텍스트만 읽으므로 이미지/폰트/미디어/트래커는 네트워크 단계에서 차단
+# (CSS는 유지: innerText의 줄 구분과 숨김 요소 제외가 스타일에 의존)
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg",
+    "*.woff", "*.woff2", "*.ttf",
+    "*.mp4", "*.webm",
+    "*google-analytics*", "*googletagmanager*", "*doubleclick*", "*facebook*",
+    "*hotjar*", "*cdn.segment.com*",
+]
 KOREA_LOCATION_KEYWORDS = (
     " seoul",
     " busan",
@@ -103,15 +131,100 @@ KNOWN_KOREA_HOTELS = {
     },
 }
 
+# 정규식은 모듈 로드 시 한 번만 컴파일
+_RE_IHG = re.compile(r',\s*an\s*ihg\s*hotel')
+_RE_LUX = re.compile(r',\s*a\s*luxury\s*collection\s*hotel')
+_RE_NONALNUM = re.compile(r'[^a-z0-9\s]')
+# _RE_NONALNUM과 같은 규칙 (ASCII 전용): 영소문자·숫자·공백 외 삭제
+_ASCII_NONALNUM_TABLE = {
+    c: None for c in range(128)
+    if not (chr(c).isspace() or 'a' <= chr(c) <= 'z' or '0' <= chr(c) <= '9')
+}
+_RE_NUMDOT = re.compile(r'\.\d+')
+_RE_BOOKBY = re.compile(r'Book by (\d{2})/(\d{2})/(\d{4}) for travel by (\d{2})/(\d{2})/(\d{4})')
+_RE_BOOKBY_STRIP = re.compile(r'\s*Book by.*')
+_RE_WSTAB = re.compile(r'[ \t]+')
+_RE_NL3 = re.compile(r'\n{3,}')
+_RE_HASH = re.compile(r'#+')
+# 가격($N) / 크레딧(USD$N) / 날짜(M/D/YYYY)를 한 번의 스캔으로 추출
+_RE_CARD_FIELDS = re.compile(
+    r'USD\$(?P<credit>\d+)'
+    r'|\$(?P<price>\d+)'
+    r'|(?P<month>\d+)/(?P<day>\d+)/(?P<year>\d+)'
+)
+
+# 카드별 WebDriver 호출(.text/outerHTML/find_element) 대신 한 번의 스크립트로 일괄 추출
+_READ_CARDS_JS = """
+let cards = document.querySelectorAll(arguments[0]);
+if (!cards.length && arguments[1]) cards = document.querySelectorAll(arguments[1]);
+return Array.from(cards).map(c => {
+    const a = c.querySelector('a');
+    return {text: c.innerText || '', html: c.outerHTML.toLowerCase(), href: a ? a.href : ''};
+});
+"""
+
+TELEGRAM_MESSAGE_LIMIT = 4000  # 텔레그램 상한(4096)보다 여유 있게
+TELEGRAM_SEND_RETRY = 3  # 조각별 최대 전송 시도 (RetryAfter 대응)
+
+# 리포트 섹션 (분류 키, 제목) - 이 순서대로 출력
+REPORT_SECTIONS = (
+    ("alltime", "🔥 역대최저 갱신"),   # 어제보다 하락 + 역대최저 갱신
+    ("drop", "📉 가격 하락"),          # 어제보다 하락
+    ("new", "🆕 신규 발견"),
+    ("rise", "🔺 가격 상승"),
+    ("same", "📌 변동 없음"),
+)
+# 분류별 호텔 메시지 (필드: url, name, price, date, yesterday, credit, atl, promo)
+HOTEL_MSG_TEMPLATES = {
+    "alltime": "🔥 <a href='{url}'>{name}</a>\n💰 오늘 최저가: <b>${price}</b>{date}{yesterday}{credit}{atl}{promo}",
+    "drop": "🔻 <a href='{url}'>{name}</a>\n💰 오늘 최저가: <b>${price}</b>{date}{yesterday}{credit}{atl}{promo}",
+    "new": "🆕 <a href='{url}'>{name}</a>\n💰 최저가: <b>${price}</b>{date}{credit}{atl}{promo}",
+    "rise": "🔺 <a href='{url}'>{name}</a>\n💰 오늘 최저가: <b>${price}</b>{date}{yesterday}{credit}{atl}{promo}",
+    "same": "🏨 <a href='{url}'>{name}</a>\n💰 최저가: <b>${price}</b>{date}{credit}{atl}{promo}",
+}
+
+# AMEX 카드에서 호텔명이 아닌 브랜드 라인 / 프로모션 라인 판별 (키워드 목록을 한 번에 스캔)
+AMEX_SKIP_KEYWORDS = (
+    "FINE HOTELS", "THE HOTEL COLLECTION", "ANDAZ",
+    "CONRAD HOTELS & RESORTS", "FAIRMONT",
+    "FOUR SEASONS HOTELS AND RESORTS", "GRAND HYATT",
+    "PARK HYATT", "LOTTE HOTELS & RESORTS",
+    "LUXURY COLLECTION", "IHG", "MARRIOTT",
+)
+AMEX_PROMO_KEYWORDS = (
+    "Complimentary third night", "Complimentary fourth night",
+    "% off", "Special Offer",
+)
+_RE_AMEX_SKIP = re.compile("|".join(map(re.escape, AMEX_SKIP_KEYWORDS)))
+_RE_AMEX_PROMO = re.compile("|".join(map(re.escape, AMEX_PROMO_KEYWORDS)))
+
+# 프로모션 번역 (원문, 번역, 전체 치환 여부) - 위에서부터 처음 일치하는 항목만 적용
+PROMO_TRANSLATIONS = (
+    ("Complimentary third night", "3박 시 1박 무료", False),
+    ("Complimentary fourth night", "4박 시 1박 무료", False),
+    ("25% off", "25% 할인", True),
+    ("15% off", "15% 할인", True),
+)
+
+MATCH_JACCARD_THRESHOLD = 0.5  # 토큰 집합 유사도 기준
+MATCH_RATIO_THRESHOLD = 0.6    # 토큰 후보가 없을 때 문자열 유사도 기준
+
+DEFAULT_CREDIT = 100  # 카드에 크레딧 표기가 없을 때 가정값 (USD)
+
 # --- [유틸리티 함수] ---
 
+@lru_cache(maxsize=4096)
 def normalize_hotel_name(name):
     if not name: return ""
     name = name.lower()
-    name = re.sub(r',\s*an\s*ihg\s*hotel', '', name)
-    name = re.sub(r',\s*a\s*luxury\s*collection\s*hotel', '', name)
-    name = re.sub(r'[^a-z0-9\s]', '', name)
-    return re.sub(r'\s+', ' ', name).strip()
+    # 접미사가 있을 때만 정규식 실행
+    if 'ihg' in name:
+        name = _RE_IHG.sub('', name)
+    if 'luxury' in name:
+        name = _RE_LUX.sub('', name)
+    # ASCII 이름은 translate 테이블로 특수문자 제거 (정규식 패스 생략)
+    name = name.translate(_ASCII_NONALNUM_TABLE) if name.isascii() else _RE_NONALNUM.sub('', name)
+    return ' '.join(name.split())
 
 def is_korea_hotel(name: str, normalized_name: Optional[str] = None) -> bool:
     norm_name = normalized_name or normalize_hotel_name(name)
@@ -122,40 +235,59 @@ def is_korea_hotel(name: str, normalized_name: Optional[str] = None) -> bool:
     padded = f" {norm_name} "
     return any(keyword in padded for keyword in KOREA_LOCATION_KEYWORDS)
 
+@lru_cache(maxsize=256)
 def translate_promo(text):
     if not text: return ""
-    text = re.sub(r'\.\d+', '', text)
+    if '.' in text:
+        text = _RE_NUMDOT.sub('', text)
     translated = text
-    if "Complimentary third night" in text:
-        translated = text.replace("Complimentary third night", "3박 시 1박 무료")
-    elif "Complimentary fourth night" in text:
-        translated = text.replace("Complimentary fourth night", "4박 시 1박 무료")
-    elif "25% off" in text:
-        translated = "25% 할인"
-    elif "15% off" in text:
-        translated = "15% 할인"
-    match = re.search(r'Book by (\d{2}/\d{2}/\d{4}) for travel by (\d{2}/\d{2}/\d{4})', translated)
+    for phrase, korean, whole in PROMO_TRANSLATIONS:
+        if phrase in text:
+            translated = korean if whole else text.replace(phrase, korean)
+            break
+    match = _RE_BOOKBY.search(translated) if "Book by" in translated else None
     if match:
-        book_date = datetime.strptime(match.group(1), "%m/%d/%Y").strftime("%Y-%m-%d")
-        travel_date = datetime.strptime(match.group(2), "%m/%d/%Y").strftime("%Y-%m-%d")
+        # MM/DD/YYYY 각 필드를 정규식에서 바로 받아 YYYY-MM-DD로 재조립
+        book_date = f"{match[3]}-{match[1]}-{match[2]}"
+        travel_date = f"{match[6]}-{match[4]}-{match[5]}"
         date_info = f" (예약마감: {book_date}, 여행기간: ~{travel_date})"
-        translated = re.sub(r'\s*Book by.*', date_info, translated)
+        translated = _RE_BOOKBY_STRIP.sub(date_info, translated)
     translated = translated.replace('\n', ' ').strip()
     return translated
 
 def clean_text(s: str) -> str:
     if not s: return ""
     s = s.replace("\r", "\n")
-    s = re.sub(r"[ \t]+", " ", s)
-    s = re.sub(r"\n{3,}", "\n\n", s)
+    s = _RE_WSTAB.sub(" ", s)
+    s = _RE_NL3.sub("\n\n", s)
     return s.strip()
 
 def clean_promo(s: str) -> str:
     if not s: return ""
-    s = re.sub(r"#+", "", s)
+    s = _RE_HASH.sub("", s)
     s = clean_text(s)
     return s
 
+@lru_cache(maxsize=1)
+def find_chrome_binary() -> Optional[str]:
+    """설치된 Chrome/Chromium 경로 (프로세스당 1회 탐색)"""
+    chrome_paths = [
+        "/usr/bin/chromium-browser", "/usr/bin/chromium",
+        "/usr/bin/google-chrome", "/usr/bin/google-chrome-stable",
+    ]
+    for path in chrome_paths:
+        if os.path.exists(path):
+            return path
+    return shutil.which("chromium-browser") or shutil.which("google-chrome")
+
+@lru_cache(maxsize=1)
+def find_chromedriver() -> Optional[str]:
+    """설치된 chromedriver 경로 (프로세스당 1회 탐색, 없으면 None → Selenium Manager 사용)"""
+    for path in ("/usr/bin/chromedriver", "/usr/lib/chromium-browser/chromedriver"):
+        if os.path.exists(path):
+            return path
+    return shutil.which("chromedriver")
+
 def create_driver():
     options = Options()
     options.add_argument("--headless=new")
@@ -164,48 +296,120 @@ def create_driver():
     options.add_argument("--disable-dev-shm-usage")
     options.add_argument("--window-size=1920,1080")
     options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_argument("--blink-settings=imagesEnabled=false")
+    # 백그라운드 탭도 스로틀링 없이 렌더링 (상세 페이지 탭 병렬 로딩용)
+    options.add_argument("--disable-background-timer-throttling")
+    options.add_argument("--disable-renderer-backgrounding")
+    options.add_argument("--disable-backgrounding-occluded-windows")
     options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-    options.page_load_strategy = 'eager'
+    options.page_load_strategy = 'none'  # get()은 즉시 반환, 준비 여부는 명시적 대기가 판단
     options.add_experimental_option("prefs", {
         "profile.managed_default_content_settings.images": 2,
         "profile.default_content_setting_values.notifications": 2,
     })
-    import shutil
-    chrome_paths = [
-        "/usr/bin/chromium-browser", "/usr/bin/chromium",
-        "/usr/bin/google-chrome", "/usr/bin/google-chrome-stable",
-    ]
-    chrome_binary = None
-    for path in chrome_paths:
-        if os.path.exists(path):
-            chrome_binary = path
-            break
-    if not chrome_binary:
-        chrome_binary = shutil.which("chromium-browser") or shutil.which("google-chrome")
+    chrome_binary = find_chrome_binary()
     if chrome_binary:
         options.binary_location = chrome_binary
         print(f"Chrome 바이너리: {chrome_binary}")
-    driver = webdriver.Chrome(options=options)
+    chromedriver = find_chromedriver()
+    if chromedriver:
+        driver = webdriver.Chrome(service=Service(executable_path=chromedriver), options=options)
+    else:
+        driver = webdriver.Chrome(options=options)  # Selenium Manager가 드라이버 탐색
     driver.set_page_load_timeout(60)
+    block_resources(driver)
     return driver
 
-def fetch_maxfhr_hotel_detail(driver, hotel_code: str, hotel_meta: dict) -> Optional[dict]:
+def block_resources(driver) -> None:
+    """현재 탭에 BLOCKED_URL_PATTERNS 요청 차단 적용 (CDP 네트워크 설정은 탭마다 따로 필요)"""
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+    except Exception as e:
+        print(f"⚠️ 리소스 차단 설정 실패 (무시하고 진행): {e}")
+
+def navigate(driver, url: str) -> None:
+    """url로 이동 (page_load_strategy='none'이라 이전 문서가 교체될 때까지만 대기)"""
+    old_root = driver.find_element(By.TAG_NAME, "html")
+    driver.get(url)
+    try:
+        WebDriverWait(driver, PAGE_WAIT_TIMEOUT).until(EC.staleness_of(old_root))
+    except TimeoutException:
+        print(f"  ⚠️ 페이지 전환 지연: {url}")
+
+def wait_for_cards(driver, selector: str, timeout: int = PAGE_WAIT_TIMEOUT) -> bool:
+    """selector에 해당하는 카드가 나타날 때까지 대기, 타임아웃이면 False"""
+    try:
+        WebDriverWait(driver, timeout).until(
+            EC.presence_of_all_elements_located((By.CSS_SELECTOR, selector))
+        )
+        return True
+    except TimeoutException:
+        return False
+
+def scroll_to_bottom(driver, max_rounds: int = 4) -> None:
+    """페이지 끝까지 스크롤, 높이가 더 늘지 않으면 (lazy-load 종료) 즉시 중단"""
+    for _ in range(max_rounds):
+        height = driver.execute_script("return document.body.scrollHeight")
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        try:
+            WebDriverWait(driver, SCROLL_WAIT_TIMEOUT).until(
+                lambda d: d.execute_script(
+                    "return document.body.scrollHeight > arguments[0]", height
+                )
+            )
+        except TimeoutException:
+            break
+
+def parse_card_fields(text: str):
+    """텍스트를 한 번 훑어 (price, earliest, credit) 반환 (각각 처음 나온 값, 없으면 None)"""
+    price = earliest = credit = None
+    if "$" not in text and "/" not in text:
+        return price, earliest, credit
+    for m in _RE_CARD_FIELDS.finditer(text):
+        kind = m.lastgroup
+        if kind == "price":
+            if price is None:
+                price = int(m["price"])
+        elif kind == "credit":
+            if credit is None:
+                credit = int(m["credit"])
+        elif earliest is None:
+            earliest = f"{m['year']}-{m['month'].zfill(2)}-{m['day'].zfill(2)}"
+        if price is not None and earliest is not None and credit is not None:
+            break
+    return price, earliest, credit
+
+def read_cards(driver, selector: str, fallback_selector: Optional[str] = None) -> list:
+    """selector 카드들의 text/html/href를 WebDriver 왕복 1회로 읽어옴 (없으면 fallback_selector로 재조회)"""
+    return driver.execute_script(_READ_CARDS_JS, selector, fallback_selector) or []
+
+def run_with_driver(fetch, *args, **kwargs):
+    """전용 드라이버로 fetch(driver, ...) 실행 후 정리 (스레드 워커용, 세션은 스레드 간 공유 불가)"""
+    driver = create_driver()
+    try:
+        return fetch(driver, *args, **kwargs)
+    finally:
+        driver.quit()
+
+def read_maxfhr_hotel_detail(driver, hotel_code: str, hotel_meta: dict) -> Optional[dict]:
+    """현재 탭에 열린 MaxFHR 호텔 상세 페이지에서 가격/날짜/크레딧 추출"""
     try:
-        driver.get(hotel_meta["url"])
-        time.sleep(4)
+        try:
+            # page_load_strategy='none'이라 탐색 직전 about:blank의 body를 잡을 수 있음 → stale이면 다시 조회
+            WebDriverWait(
+                driver, PAGE_WAIT_TIMEOUT,
+                ignored_exceptions=(NoSuchElementException, StaleElementReferenceException),
+            ).until(
+                lambda d: "$" in d.find_element(By.TAG_NAME, "body").text
+            )
+        except TimeoutException:
+            pass
         text = driver.find_element(By.TAG_NAME, "body").text
-        price_match = re.search(r'\$(\d+)', text)
-        if not price_match:
+        price, earliest, credit = parse_card_fields(text)
+        if price is None:
             print(f"    - fallback missing price: {hotel_meta['name']}")
             return None
-        price = int(price_match.group(1))
-        date_match = re.search(r'(\d+)/(\d+)/(\d+)', text)
-        earliest = (
-            f"{date_match.group(3)}-{date_match.group(1).zfill(2)}-{date_match.group(2).zfill(2)}"
-            if date_match else None
-        )
-        credit_match = re.search(r'USD\$(\d+)', text)
-        credit = int(credit_match.group(1)) if credit_match else None
         return {
             "code": hotel_code,
             "name": hotel_meta["name"],
@@ -219,86 +423,114 @@ def fetch_maxfhr_hotel_detail(driver, hotel_code: str, hotel_meta: dict) -> Opti
         print(f"    - fallback failed for {hotel_meta['name']}: {e}")
         return None
 
+def fetch_missing_known_hotels(driver, all_hotels: dict) -> None:
+    """목록에서 빠진 KNOWN_KOREA_HOTELS를 상세 페이지로 보충 (all_hotels[code]에 직접 추가)"""
+    missing_codes = [code for code in KNOWN_KOREA_HOTEL_CODES if code not in all_hotels]
+    if not missing_codes:
+        return
+    print(f"  - fallback check for missing Korea hotels: {len(missing_codes)}")
+
+    # 상세 페이지를 한 드라이버의 탭으로 한꺼번에 열어 로딩을 겹침 (순차 driver.get 대체)
+    # new_window는 만든 탭으로 바로 전환되므로 탭 핸들과 호텔이 항상 1:1로 대응
+    # (page_load_strategy='none'이라 get은 로딩 완료를 기다리지 않음)
+    # 탭 하나가 실패해도 나머지 탭/목록 수집 결과는 유지하고, 끝나면 항상 원래 탭으로 복귀
+    main_handle = driver.current_window_handle
+    tabs = {}
+    try:
+        for code in missing_codes:
+            hotel_meta = KNOWN_KOREA_HOTELS[code]
+            try:
+                driver.switch_to.new_window('tab')
+                tabs[code] = driver.current_window_handle
+                block_resources(driver)
+                driver.get(hotel_meta["url"])
+            except Exception as e:
+                print(f"    - fallback tab open failed for {hotel_meta['name']}: {e}")
+
+        for code, handle in tabs.items():
+            hotel_meta = KNOWN_KOREA_HOTELS[code]
+            try:
+                driver.switch_to.window(handle)
+            except Exception as e:
+                print(f"    - fallback failed for {hotel_meta['name']}: {e}")
+                continue
+            try:
+                hotel = read_maxfhr_hotel_detail(driver, code, hotel_meta)
+                if hotel:
+                    all_hotels[code] = hotel
+            except Exception as e:
+                print(f"    - fallback failed for {hotel_meta['name']}: {e}")
+            finally:
+                try:
+                    driver.close()
+                except Exception as e:
+                    print(f"    - fallback tab close failed for {hotel_meta['name']}: {e}")
+    finally:
+        try:
+            driver.switch_to.window(main_handle)
+        except Exception as e:
+            print(f"    - 원래 탭 복귀 실패: {e}")
+
+def parse_maxfhr_cards(driver, all_hotels: dict) -> int:
+    """현재 페이지의 MaxFHR 카드를 파싱해 all_hotels[code]에 추가 (중복 code는 무시), 추가된 개수 반환"""
+    cards = read_cards(driver, MAXFHR_CARD_SELECTOR, "article")
+
+    count = 0
+    for card in cards:
+        try:
+            text = card["text"]
+            if "$" not in text:  # 가격 없는 카드는 이후 처리 없이 건너뜀
+                continue
+            name = text.partition("\n")[0]
+            html = card["html"]
+            if "thc" in html or "hotel collection" in html:
+                continue
+            norm_name = normalize_hotel_name(name)
+            if norm_name in all_hotels:  # 이미 수집된 호텔은 파싱 생략
+                continue
+            price, earliest, credit = parse_card_fields(text)
+            if price is None:
+                continue
+            link = card["href"] or "https://maxfhr.com"
+            if not is_korea_hotel(name, norm_name):
+                print(f"    - skip non-Korea MaxFHR result: {name}")
+                continue
+            all_hotels[norm_name] = {
+                "code": norm_name,
+                "name": name,
+                "price": price,
+                "earliest": earliest,
+                "credit": credit,
+                "url": link,
+                "normalized_name": norm_name,
+            }
+            count += 1
+        except Exception:
+            continue
+    return count
+
 def fetch_maxfhr_country(driver, retry=3):
     for attempt in range(retry):
         try:
-            all_hotels = []
+            all_hotels = {}
             print(f"MaxFHR country attempt ({attempt+1}/{retry})...")
-            try:
-                driver.get(MAXFHR_KOREA_URL)
-            except TimeoutException:
-                print("  - MaxFHR Korea page load timeout, continuing")
-                driver.execute_script("window.stop();")
-            time.sleep(5)
+            navigate(driver, MAXFHR_KOREA_URL)
+            if not wait_for_cards(driver, MAXFHR_CARD_SELECTOR):
+                print("  - MaxFHR Korea cards not rendered in time, continuing")
 
             try:
-                for _ in range(4):
-                    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                    time.sleep(2)
+                scroll_to_bottom(driver)
             except Exception:
                 pass
 
-            cards = driver.find_elements(By.CSS_SELECTOR, "div.chakra-card")
-            if not cards:
-                cards = driver.find_elements(By.TAG_NAME, "article")
-
-            count = 0
-            for card in cards:
-                try:
-                    text = card.text
-                    html = card.get_attribute("outerHTML").lower()
-                    lines = text.split("\n")
-                    if not lines:
-                        continue
-                    name = lines[0]
-                    if "thc" in html or "hotel collection" in html:
-                        continue
-                    price_match = re.search(r"\$(\d+)", text)
-                    if not price_match:
-                        continue
-                    price = int(price_match.group(1))
-                    date_match = re.search(r"(\d+)/(\d+)/(\d+)", text)
-                    earliest = f"{date_match.group(3)}-{date_match.group(1).zfill(2)}-{date_match.group(2).zfill(2)}" if date_match else None
-                    credit = None
-                    credit_match = re.search(r"USD\$(\d+)", text)
-                    if credit_match:
-                        credit = int(credit_match.group(1))
-                    try:
-                        link = card.find_element(By.TAG_NAME, "a").get_attribute("href")
-                    except Exception:
-                        link = "https://maxfhr.com"
-                    norm_name = normalize_hotel_name(name)
-                    if not is_korea_hotel(name, norm_name):
-                        print(f"    - skip non-Korea MaxFHR result: {name}")
-                        continue
-                    if not any(h["code"] == norm_name for h in all_hotels):
-                        all_hotels.append({
-                            "code": norm_name,
-                            "name": name,
-                            "price": price,
-                            "earliest": earliest,
-                            "credit": credit,
-                            "url": link,
-                            "normalized_name": norm_name,
-                        })
-                        count += 1
-                except Exception:
-                    continue
-
+            count = parse_maxfhr_cards(driver, all_hotels)
             print(f"  - MaxFHR Korea page hotels found: {count}")
 
-            existing_codes = {hotel["code"] for hotel in all_hotels}
-            missing_codes = [code for code in KNOWN_KOREA_HOTEL_CODES if code not in existing_codes]
-            if missing_codes:
-                print(f"  - fallback check for missing Korea hotels: {len(missing_codes)}")
-            for code in missing_codes:
-                hotel = fetch_maxfhr_hotel_detail(driver, code, KNOWN_KOREA_HOTELS[code])
-                if hotel:
-                    all_hotels.append(hotel)
+            fetch_missing_known_hotels(driver, all_hotels)
 
             if all_hotels:
                 print(f"MaxFHR country success: {len(all_hotels)} hotels")
-                return all_hotels
+                return list(all_hotels.values())
             raise Exception("hotel data empty")
         except Exception as e:
             if attempt < retry - 1:
@@ -311,172 +543,47 @@ def fetch_maxfhr_country(driver, retry=3):
 
 # --- [크롤링 함수] ---
 
-def fetch_maxfhr(driver, retry=3):
-    for attempt in range(retry):
-        try:
-            cities = ["Seoul", "Busan", "Jeju"]
-            all_hotels = []
-            print(f"MaxFHR 접속 시도 ({attempt+1}/{retry})...")
-            try:
-                driver.get("https://maxfhr.com")
-            except TimeoutException:
-                print("  ⚠️ 메인 페이지 로딩 지연 (진행 계속)")
-                driver.execute_script("window.stop();")
-            time.sleep(5)
-            for idx, city in enumerate(cities):
-                print(f"  [{idx+1}/3] '{city}' 검색 중...")
-                if idx > 0:
-                    try:
-                        driver.get("https://maxfhr.com")
-                        time.sleep(3)
-                    except:
-                        pass
-                try:
-                    inp = WebDriverWait(driver, 20).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, "input[placeholder*='Hotel'], input[placeholder*='Destination'], input.chakra-input"))
-                    )
-                    inp.clear()
-                    inp.send_keys(city)
-                    time.sleep(1)
-                    try:
-                        inp.send_keys(Keys.RETURN)
-                    except Exception:
-                        print("  ⚠️ 엔터 키 입력 중 지연 (무시하고 진행)")
-                        pass
-                    time.sleep(8)
-                except TimeoutException:
-                    print(f"    ⚠️ {city} 검색창 찾기 실패 (타임아웃)")
-                    continue
-                except Exception as e:
-                    print(f"    ⚠️ {city} 검색 중 오류: {e}")
-                    continue
-                try:
-                    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                    time.sleep(3)
-                except:
-                    pass
-                cards = driver.find_elements(By.CSS_SELECTOR, "div.chakra-card")
-                if not cards:
-                    cards = driver.find_elements(By.TAG_NAME, "article")
-                count = 0
-                for card in cards:
-                    try:
-                        text = card.text
-                        html = card.get_attribute('outerHTML').lower()
-                        lines = text.split('\n')
-                        if not lines: continue
-                        name = lines[0]
-                        if "thc" in html or "hotel collection" in html:
-                            continue
-                        price_match = re.search(r'\$(\d+)', text)
-                        if not price_match: continue
-                        price = int(price_match.group(1))
-                        date_match = re.search(r'(\d+)/(\d+)/(\d+)', text)
-                        earliest = f"{date_match.group(3)}-{date_match.group(1).zfill(2)}-{date_match.group(2).zfill(2)}" if date_match else None
-                        credit = None
-                        credit_match = re.search(r'USD\$(\d+)', text)
-                        if credit_match:
-                            credit = int(credit_match.group(1))
-                        try:
-                            link = card.find_element(By.TAG_NAME, "a").get_attribute("href")
-                        except:
-                            link = "https://maxfhr.com"
-                        norm_name = normalize_hotel_name(name)
-                        if not is_korea_hotel(name, norm_name):
-                            print(f"    - skip non-Korea MaxFHR result: {name}")
-                            continue
-                        if not any(h['code'] == norm_name for h in all_hotels):
-                            all_hotels.append({
-                                "code": norm_name,
-                                "name": name,
-                                "price": price,
-                                "earliest": earliest,
-                                "credit": credit,
-                                "url": link,
-                                "normalized_name": norm_name
-                            })
-                            count += 1
-                    except:
-                        continue
-                print(f"    ✓ {count}개 호텔 발견")
-            existing_codes = {hotel["code"] for hotel in all_hotels}
-            missing_codes = [code for code in KNOWN_KOREA_HOTEL_CODES if code not in existing_codes]
-            if missing_codes:
-                print(f"  - fallback check for missing Korea hotels: {len(missing_codes)}")
-            for code in missing_codes:
-                hotel = fetch_maxfhr_hotel_detail(driver, code, KNOWN_KOREA_HOTELS[code])
-                if hotel:
-                    all_hotels.append(hotel)
-            if all_hotels:
-                print(f"✅ MaxFHR 수집 성공: {len(all_hotels)}개 호텔")
-                return all_hotels
-            else:
-                raise Exception("호텔 데이터 0개")
-        except Exception as e:
-            if attempt < retry - 1:
-                print(f"⚠️ MaxFHR 재시도 중... ({attempt+1}/{retry}) - {e}")
-                time.sleep(10)
-                continue
-            else:
-                print(f"❌ MaxFHR 최종 실패: {e}")
-                return []
-    return []
-
 def fetch_amex(driver, retry=3):
     for attempt in range(retry):
         try:
             print(f"AMEX 접속 시도 ({attempt+1}/{retry})...")
-            driver.get(AMEX_LIST_URL)
-            time.sleep(8)
+            navigate(driver, AMEX_LIST_URL)
+            if not wait_for_cards(driver, AMEX_CARD_SELECTOR):
+                print("  ⚠️ AMEX 카드 대기 타임아웃 (진행 계속)")
             try:
                 webdriver.ActionChains(driver).send_keys(Keys.ESCAPE).perform()
             except:
                 pass
-            for _ in range(3):
-                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(3)
-            cards = driver.find_elements(By.CSS_SELECTOR, "div.card, div.hotel-card")
+            scroll_to_bottom(driver, max_rounds=3)
+            cards = read_cards(driver, AMEX_CARD_SELECTOR)
             print(f"  → {len(cards)}개 카드 발견")
             hotels = []
             for idx, card in enumerate(cards):
                 try:
-                    text = card.text
-                    lines = [line.strip() for line in text.split('\n') if line.strip()]
+                    text = card["text"]
+                    lines = [line for line in map(str.strip, text.splitlines()) if line]
                     if not lines: continue
                     name = None
-                    skip_keywords = [
-                        "FINE HOTELS", "THE HOTEL COLLECTION", "ANDAZ",
-                        "CONRAD HOTELS & RESORTS", "FAIRMONT",
-                        "FOUR SEASONS HOTELS AND RESORTS", "GRAND HYATT",
-                        "PARK HYATT", "LOTTE HOTELS & RESORTS",
-                        "LUXURY COLLECTION", "IHG", "MARRIOTT"
-                    ]
                     for line in lines:
-                        if line.isupper() and any(skip in line for skip in skip_keywords):
+                        if line.isupper() and _RE_AMEX_SKIP.search(line):
                             continue
                         if "South Korea" in line or line == "Korea":
                             continue
                         if len(line) > 50:
                             continue
-                        if line and not line.startswith("Book") and not line.startswith("Complimentary"):
+                        if not line.startswith(("Book", "Complimentary")):
                             name = line
                             break
                     if not name: continue
                     promo_parts = []
-                    i = 0
-                    while i < len(lines):
-                        line = lines[i]
-                        if any(keyword in line for keyword in [
-                            "Complimentary third night", "Complimentary fourth night",
-                            "% off", "Special Offer"
-                        ]):
+                    for i, line in enumerate(lines):
+                        if _RE_AMEX_PROMO.search(line):
                             promo_parts.append(line)
                             if i + 1 < len(lines):
                                 next_line = lines[i + 1]
                                 if "Book by" in next_line or "for travel" in next_line:
                                     promo_parts.append(next_line)
                             break
-                        i += 1
                     promo = " ".join(promo_parts) if promo_parts else None
                     norm_name = normalize_hotel_name(name)
                     if not is_korea_hotel(name, norm_name):
@@ -504,17 +611,95 @@ def fetch_amex(driver, retry=3):
                 return []
     return []
 
+def _best_ratio_matches(names: list, amex_list: list) -> list:
+    """names 각각에 대해 AMEX 목록에서 문자열 유사도가 가장 높은 항목 (기준 미달이면 None)"""
+    amex_names = [am['normalized_name'] for am in amex_list]
+    if not names or not amex_names:
+        return [None] * len(names)
+    if fuzz_process is not None:
+        # rapidfuzz 점수(Indel, LCS 기반)는 difflib ratio의 상한이므로 후보 추리기에만 사용:
+        # 상한이 높은 후보부터 difflib ratio로 확정, 상한이 현재 최고점 아래로 내려가면 중단
+        # (기준 통과/선택 결과는 아래 difflib 경로와 동일)
+        bounds = fuzz_process.cdist(
+            names, amex_names,
+            scorer=fuzz.ratio,
+            score_cutoff=MATCH_RATIO_THRESHOLD * 100,  # 상한이 기준 미달인 쌍은 0점
+            workers=-1,
+        )
+        sm = SequenceMatcher(None, autojunk=False)
+        matches = []
+        for name, row in zip(names, bounds):
+            sm.set_seq1(name)
+            best_score, best_j = MATCH_RATIO_THRESHOLD, None
+            candidates = sorted((j for j in range(len(row)) if row[j]), key=row.__getitem__, reverse=True)
+            for j in candidates:
+                if row[j] / 100 + 1e-9 < best_score:
+                    break
+                sm.set_seq2(amex_names[j])
+                score = sm.ratio()
+                # 점수가 같으면 difflib 경로처럼 목록에서 앞선 AMEX 항목 유지
+                if score > best_score or (score == best_score and best_j is not None and j < best_j):
+                    best_score, best_j = score, j
+            matches.append(amex_list[best_j] if best_j is not None else None)
+        return matches
+    # AMEX 이름을 seq2로 고정해 b2j 테이블을 항목당 한 번만 생성,
+    # 상한값(real_quick_ratio/quick_ratio)이 현재 최고점을 못 넘으면 ratio() 생략
+    best_scores = [0] * len(names)
+    best_amex = [None] * len(names)
+    sm = SequenceMatcher(None, autojunk=False)
+    for am in amex_list:
+        sm.set_seq2(am['normalized_name'])
+        for i, name in enumerate(names):
+            sm.set_seq1(name)
+            if sm.real_quick_ratio() <= best_scores[i] or sm.quick_ratio() <= best_scores[i]:
+                continue
+            score = sm.ratio()
+            if score > best_scores[i]:
+                best_scores[i] = score
+                best_amex[i] = am
+    return [
+        am if score > MATCH_RATIO_THRESHOLD else None
+        for am, score in zip(best_amex, best_scores)
+    ]
+
 def match_hotels(amex_list, maxfhr_list):
-    matched = []
-    for mf in maxfhr_list:
+    """
+    MaxFHR 호텔마다 가장 비슷한 AMEX 호텔을 찾아 짝지음
+
+    AMEX 이름 토큰 → 인덱스 역색인으로 토큰을 공유하는 후보만 Jaccard로 비교하고,
+    기준을 넘는 후보가 없는 호텔만 모아 전체 목록 문자열 유사도로 fallback.
+    """
+    amex_tokens = [frozenset(am['normalized_name'].split()) for am in amex_list]
+    token_index = defaultdict(list)
+    for idx, tokens in enumerate(amex_tokens):
+        for token in tokens:
+            token_index[token].append(idx)
+
+    best_matches = []
+    pending = []  # Jaccard 기준 미달 → fallback 대상 인덱스
+    for i, mf in enumerate(maxfhr_list):
+        mf_tokens = frozenset(mf['normalized_name'].split())
+        candidates = {idx for token in mf_tokens for idx in token_index.get(token, ())}
         best_amex = None
         best_score = 0
-        for am in amex_list:
-            score = SequenceMatcher(None, mf['normalized_name'], am['normalized_name']).ratio()
+        for idx in sorted(candidates):
+            am_tokens = amex_tokens[idx]
+            score = len(mf_tokens & am_tokens) / len(mf_tokens | am_tokens)
             if score > best_score:
                 best_score = score
-                best_amex = am
-        if best_score > 0.6:
+                best_amex = amex_list[idx]
+        if best_score < MATCH_JACCARD_THRESHOLD:
+            best_amex = None
+            pending.append(i)
+        best_matches.append(best_amex)
+
+    fallback = _best_ratio_matches([maxfhr_list[i]['normalized_name'] for i in pending], amex_list)
+    for i, am in zip(pending, fallback):
+        best_matches[i] = am
+
+    matched = []
+    for mf, best_amex in zip(maxfhr_list, best_matches):
+        if best_amex is not None:
             matched.append({"maxfhr": mf, "amex": best_amex})
         else:
             matched.append({"maxfhr": mf, "amex": {"name": mf['name'], "promo": None}})
@@ -522,11 +707,55 @@ def match_hotels(amex_list, maxfhr_list):
 
 # --- [메인 실행 로직] ---
 
-def build_section(title: str, items: list) -> str:
+def build_section(title: str, items: list) -> list:
+    """섹션 제목 + 호텔 메시지 목록 (호텔이 없으면 빈 리스트)"""
     if not items:
-        return ""
-    body = "\n\n".join(items).strip()
-    return f"\n\n<b>{title} ({len(items)}개)</b>\n\n{body}"
+        return []
+    return [f"<b>{title} ({len(items)}개)</b>", *items]
+
+
+def split_message(parts: list, limit: int = TELEGRAM_MESSAGE_LIMIT) -> list:
+    """호텔 단위 조각을 빈 줄로 이어 limit 이하 메시지로 묶음 → HTML 태그 중간 절단 방지"""
+    chunks = []
+    current = ""
+    for part in parts:
+        if current and len(current) + len(part) + 2 > limit:
+            chunks.append(current)
+            current = part
+        else:
+            current = current + "\n\n" + part if current else part
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+async def send_report(bot, chat_id: str, parts: list) -> None:
+    """
+    리포트 전송 (하나의 Bot 커넥션 풀 재사용)
+
+    같은 채팅에 조각을 동시에 보내면 도착 순서가 뒤섞이므로 조각은 순서대로 전송.
+    flood control(RetryAfter)에 걸리면 안내된 시간만큼 기다린 뒤 같은 조각을 재전송.
+    Bot 초기화(getMe)는 전송 직전에만 수행 (수집/저장이 텔레그램 장애에 영향받지 않도록).
+    """
+    await bot.initialize()
+    for chunk in split_message(parts):
+        for attempt in range(TELEGRAM_SEND_RETRY):
+            try:
+                await bot.send_message(
+                    chat_id=chat_id,
+                    text=chunk,
+                    parse_mode="HTML",
+                    disable_web_page_preview=True,
+                )
+                break
+            except RetryAfter as e:
+                if attempt == TELEGRAM_SEND_RETRY - 1:
+                    raise
+                delay = e.retry_after
+                if hasattr(delay, "total_seconds"):
+                    delay = delay.total_seconds()
+                print(f"⏳ 텔레그램 전송 제한: {delay}초 후 재시도")
+                await asyncio.sleep(delay)
 
 
 async def run():
@@ -546,19 +775,33 @@ async def run():
         print(f"❌ chat_id 없음 (TARGET={target}). Secrets 설정을 확인하세요.")
         return
 
-    bot = Bot(token=token)
-    driver = create_driver()
+    bot = Bot(token=token, request=HTTPXRequest(connection_pool_size=8))
 
     try:
         print("🚀 모니터링 시작...")
 
-        # 1) 데이터 수집
-        maxfhr_data = fetch_maxfhr_country(driver, retry=3)
-        amex_data = fetch_amex(driver, retry=3)
+        # 1) 데이터 수집 (MaxFHR/AMEX 각자 드라이버로 동시 수집)
+        #    한쪽 드라이버가 죽어도 다른 쪽 결과는 살림
+        #    스크래핑 대기 중에 history/로그 파일도 미리 읽어 둠
+        maxfhr_data, amex_data, preload_result = await asyncio.gather(
+            asyncio.to_thread(run_with_driver, fetch_maxfhr_country, retry=3),
+            asyncio.to_thread(run_with_driver, fetch_amex, retry=3),
+            asyncio.to_thread(storage.preload),
+            return_exceptions=True,
+        )
+        if isinstance(preload_result, Exception):
+            print(f"⚠️ 저장 데이터 미리 읽기 실패 (비교 단계에서 다시 시도): {preload_result}")
+        if isinstance(maxfhr_data, Exception):
+            print(f"❌ MaxFHR 드라이버 오류: {maxfhr_data}")
+            maxfhr_data = []
+        if isinstance(amex_data, Exception):
+            print(f"⚠️ AMEX 드라이버 오류 (MaxFHR만 사용): {amex_data}")
+            amex_data = []
 
         if not maxfhr_data:
             print("❌ 호텔 데이터를 하나도 못 가져왔습니다.")
             if target != "channel":
+                await bot.initialize()
                 await bot.send_message(
                     chat_id=chat_id,
                     text="❌ MaxFHR 접속 실패 (타임아웃)\n다음 실행 시 재시도됩니다.",
@@ -572,9 +815,7 @@ async def run():
         # 3) 가격 비교
         #    - 분류 기준: 어제(직전 실행) 대비
         #    - 추가 표시: 역대최저 대비
-        prev_history = storage.load_history()  # 어제 가격
-        today_str = datetime.now().strftime("%Y-%m-%d")
-        prev_history_raw = storage.load_history()
+        prev_history_raw = storage.load_history()  # 어제 가격
         prev_history = {
             code: hotel
             for code, hotel in prev_history_raw.items()
@@ -583,27 +824,52 @@ async def run():
         removed_prev_codes = sorted(set(prev_history_raw) - set(prev_history))
         if removed_prev_codes:
             print(f"Removed non-Korea hotels from history: {', '.join(removed_prev_codes)}")
-        today_str = datetime.now().strftime("%Y-%m-%d")
-        new_history = {}
+        run_started = datetime.now()  # 날짜/헤더 시각 공통 기준
+        today_str = run_started.strftime("%Y-%m-%d")
+
+        # 저장용 데이터는 메시지 작성과 분리해 한 번에 생성
+        maxfhr_rows = [item["maxfhr"] for item in final_list]
+        hotels_snapshot = [
+            {
+                "code": mf["code"],
+                "name": mf["name"],
+                "price": mf["price"],
+                "earliest": mf.get("earliest"),
+                "credit": mf["credit"] if mf.get("credit") is not None else DEFAULT_CREDIT,
+            }
+            for mf in maxfhr_rows
+        ]
+        # 역대 최저가 (오늘 제외)
+        all_time_lows = storage.get_all_time_lows(
+            [snap["code"] for snap in hotels_snapshot], exclude_date=today_str
+        )
+        new_history = {
+            snap["code"]: {
+                "price": snap["price"],
+                "name": snap["name"],
+                "earliest": snap["earliest"],
+                "all_time_low": (
+                    min(snap["price"], all_time_lows[snap["code"]]["price"])
+                    if all_time_lows[snap["code"]] else snap["price"]
+                ),
+                "updated": today_str,
+                "credit": snap["credit"],
+                "credit_inferred": mf.get("credit") is None,
+            }
+            for mf, snap in zip(maxfhr_rows, hotels_snapshot)
+        }
 
-        alltime_msgs = []   # 🔥 역대최저 갱신
-        drop_msgs = []      # 📉 어제 대비 하락
-        new_msgs = []       # 🆕 신규
-        rise_msgs = []      # 🔺 어제 대비 상승
-        same_msgs = []      # 📌 변동 없음
-        hotels_snapshot = []
+        section_msgs = {key: [] for key, _ in REPORT_SECTIONS}
 
         print("\n💰 가격 분석 중...")
-        for item in final_list:
+        for item, snap in zip(final_list, hotels_snapshot):
             mf = item["maxfhr"]
             am = item["amex"]
 
-            code = mf["code"]
-            price = mf["price"]
-            name = mf["name"]
-
-            credit_val = mf.get("credit")
-            credit_display = credit_val if credit_val is not None else 100
+            code = snap["code"]
+            price = snap["price"]
+            name = snap["name"]
+            credit_display = snap["credit"]
 
             # ── 어제 가격 (직전 실행) ──
             prev = prev_history.get(code)
@@ -611,31 +877,10 @@ async def run():
             yesterday_price = prev["price"] if prev else None
 
             # ── 역대 최저가 (오늘 제외) ──
-            atl = storage.get_all_time_low(code, exclude_date=today_str)
+            atl = all_time_lows[code]
             atl_price = atl["price"] if atl else None
             atl_date = atl["date"] if atl else None
 
-            # ── history 업데이트 ──
-            all_time_low = min(price, atl_price) if atl_price is not None else price
-            new_history[code] = {
-                "price": price,
-                "name": name,
-                "earliest": mf.get("earliest"),
-                "all_time_low": all_time_low,
-                "updated": today_str,
-                "credit": credit_display,
-                "credit_inferred": credit_val is None,
-            }
-
-            # ── 스냅샷 ──
-            hotels_snapshot.append({
-                "code": code,
-                "name": name,
-                "price": price,
-                "earliest": mf.get("earliest"),
-                "credit": credit_display,
-            })
-
             # ── 공통 텍스트 ──
             promo = am.get("promo")
             promo_kr = translate_promo(promo) if promo else ""
@@ -673,57 +918,33 @@ async def run():
 
             # ── 분류: 어제 대비 기준 ──
             if is_new:
-                msg = (
-                    f"🆕 <a href='{mf['url']}'>{name}</a>\n"
-                    f"💰 최저가: <b>${price}</b>{date_txt}"
-                    f"{credit_txt}{atl_txt}{promo_txt}"
-                )
-                new_msgs.append(msg)
-
+                category = "new"
             elif price < yesterday_price:
-                if is_new_alltime:
-                    # 어제보다 하락 + 역대최저 갱신
-                    msg = (
-                        f"🔥 <a href='{mf['url']}'>{name}</a>\n"
-                        f"💰 오늘 최저가: <b>${price}</b>{date_txt}"
-                        f"{yesterday_txt}"
-                        f"{credit_txt}"
-                        f"{atl_txt}"
-                        f"{promo_txt}"
-                    )
-                    alltime_msgs.append(msg)
-                else:
-                    # 어제보다 하락 (역대최저는 아님)
-                    msg = (
-                        f"🔻 <a href='{mf['url']}'>{name}</a>\n"
-                        f"💰 오늘 최저가: <b>${price}</b>{date_txt}"
-                        f"{yesterday_txt}"
-                        f"{credit_txt}{atl_txt}{promo_txt}"
-                    )
-                    drop_msgs.append(msg)
+                # 어제보다 하락 (+ 역대최저 갱신 여부)
+                category = "alltime" if is_new_alltime else "drop"
                 print(f"  하락: {name} ${yesterday_price}→${price} (-${yesterday_price - price})")
-
             elif price > yesterday_price:
-                msg = (
-                    f"🔺 <a href='{mf['url']}'>{name}</a>\n"
-                    f"💰 오늘 최저가: <b>${price}</b>{date_txt}"
-                    f"{yesterday_txt}"
-                    f"{credit_txt}{atl_txt}{promo_txt}"
-                )
-                rise_msgs.append(msg)
-
+                category = "rise"
             else:
-                # 어제와 동일
-                msg = (
-                    f"🏨 <a href='{mf['url']}'>{name}</a>\n"
-                    f"💰 최저가: <b>${price}</b>{date_txt}"
-                    f"{credit_txt}{atl_txt}{promo_txt}"
-                )
-                same_msgs.append(msg)
+                category = "same"
+
+            section_msgs[category].append(HOTEL_MSG_TEMPLATES[category].format_map({
+                "url": mf["url"],
+                "name": name,
+                "price": price,
+                "date": date_txt,
+                "yesterday": yesterday_txt,
+                "credit": credit_txt,
+                "atl": atl_txt,
+                "promo": promo_txt,
+            }))
 
         # 4) 저장 (merge 방식 + partial 마킹)
-        storage.append_log(hotels_snapshot, prev_count=len(prev_history))
-        storage.save_history(new_data=new_history, prev_data=prev_history)
+        #    로그/history는 서로 다른 파일이므로 동시에 기록
+        await asyncio.gather(
+            asyncio.to_thread(storage.append_log, hotels_snapshot, prev_count=len(prev_history)),
+            asyncio.to_thread(storage.save_history, new_data=new_history, prev_data=prev_history),
+        )
 
         # 5) 전송
         partial_warning = ""
@@ -735,47 +956,16 @@ async def run():
 
         header = (
             f"📅 <b>한국 FHR 호텔 가격 정보</b>\n"
-            f"업데이트: {datetime.now().strftime('%Y-%m-%d %H:%M')}"
+            f"업데이트: {run_started.strftime('%Y-%m-%d %H:%M')}"
             f"{partial_warning}"
         )
 
-        final_msg = (
-            header
-            + build_section("🔥 역대최저 갱신", alltime_msgs)
-            + build_section("📉 가격 하락", drop_msgs)
-            + build_section("🆕 신규 발견", new_msgs)
-            + build_section("🔺 가격 상승", rise_msgs)
-            + build_section("📌 변동 없음", same_msgs)
-        ).rstrip()
-
-        if len(final_msg) > 4000:
-            # 호텔 단위로 분할 (\n\n 기준) → HTML 태그 중간 절단 방지
-            chunks = []
-            current = ""
-            for part in final_msg.split("\n\n"):
-                if len(current) + len(part) + 2 > 4000:
-                    if current:
-                        chunks.append(current.rstrip())
-                    current = part
-                else:
-                    current = current + "\n\n" + part if current else part
-            if current:
-                chunks.append(current.rstrip())
+        # 전체 문자열을 만들었다가 다시 쪼개지 않고 조각 목록에서 바로 메시지 묶음 생성
+        report_parts = [header]
+        for key, title in REPORT_SECTIONS:
+            report_parts.extend(build_section(title, section_msgs[key]))
 
-            for chunk in chunks:
-                await bot.send_message(
-                    chat_id=chat_id,
-                    text=chunk,
-                    parse_mode="HTML",
-                    disable_web_page_preview=True,
-                )
-        else:
-            await bot.send_message(
-                chat_id=chat_id,
-                text=final_msg,
-                parse_mode="HTML",
-                disable_web_page_preview=True,
-            )
+        await send_report(bot, chat_id, report_parts)
 
         print("✅ 전체 리포트 전송 완료")
 
@@ -783,9 +973,13 @@ async def run():
         print(f"❌ 오류 발생: {e}")
         logger.error(f"Error: {e}", exc_info=True)
     finally:
-        if driver:
-            driver.quit()
+        await bot.shutdown()
 
 
 if __name__ == "__main__":
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
     asyncio.run(run())
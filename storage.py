@@ -4,14 +4,34 @@
 - price_log.jsonl: 일별 이력 (JSONL 형식)
 """
 import json
+import os
+from collections import defaultdict, deque
 from pathlib import Path
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 
+try:
+    import orjson
+except ImportError:
+    orjson = None  # 없으면 표준 json 사용
+
 # 업데이트 없이 history에 유지할 최대 일수
 STALE_DAYS = 7
 
 
+def _dumps(data) -> bytes:
+    """compact JSON 직렬화 (orjson 우선)"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _loads(raw: bytes):
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
 class HotelStorage:
     """호텔 가격 데이터 저장소"""
     
@@ -22,18 +42,27 @@ class HotelStorage:
         self.history_file = self.base_dir / "price_history.json"
         self.log_file = self.base_dir / "price_log.jsonl"
         self._logs_cache = None  # load_logs 반복 호출 방지
+        self._code_index = None  # 호텔 코드 → 날짜별 가격 목록 (partial 로그 제외)
+        self._history_cache = None  # 디스크의 history 내용 (변경 없는 재저장 방지)
     
     def load_history(self) -> Dict:
-        """현재 가격 정보 로드"""
-        if not self.history_file.exists():
-            return {}
+        """현재 가격 정보 로드 (캐싱 지원)"""
+        if self._history_cache is None:
+            if not self.history_file.exists():
+                return {}
+            
+            try:
+                self._history_cache = _loads(self.history_file.read_bytes())
+            except Exception as e:
+                print(f"⚠️ history 로드 실패: {e}")
+                return {}
         
-        try:
-            with open(self.history_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"⚠️ history 로드 실패: {e}")
-            return {}
+        return dict(self._history_cache)
+    
+    def preload(self) -> None:
+        """history/로그 파일을 미리 읽어 캐시 (스크래핑 대기 시간과 겹치기용)"""
+        self.load_history()
+        self.load_logs()
     
     def save_history(self, new_data: Dict, prev_data: Dict = None) -> None:
         """
@@ -41,8 +70,11 @@ class HotelStorage:
         
         - 기존 history를 base로, 오늘 수집된 호텔만 업데이트
         - STALE_DAYS 이상 업데이트 없는 호텔은 자동 제거
+        - 임시 파일에 쓰고 fsync한 뒤 교체 (쓰기 도중 중단돼도 기존 파일 보존)
+        - 디스크 내용과 같으면 다시 쓰지 않음
         """
-        today_str = datetime.now().strftime("%Y-%m-%d")
+        now = datetime.now()
+        today_str = now.strftime("%Y-%m-%d")
         
         if prev_data is None:
             prev_data = {}
@@ -52,7 +84,7 @@ class HotelStorage:
         merged.update(new_data)
         
         # stale 호텔 제거 (STALE_DAYS 이상 업데이트 없는 항목)
-        cutoff = (datetime.now() - timedelta(days=STALE_DAYS)).strftime("%Y-%m-%d")
+        cutoff = (now - timedelta(days=STALE_DAYS)).strftime("%Y-%m-%d")
         stale_keys = [
             k for k, v in merged.items()
             if v.get("updated", today_str) < cutoff
@@ -61,11 +93,24 @@ class HotelStorage:
             print(f"  🗑️ stale 호텔 제거: {merged[k].get('name', k)} (마지막 업데이트: {merged[k].get('updated')})")
             del merged[k]
         
+        if self.history_file.exists() and merged == self.load_history():
+            print("  history 변경 없음 → 저장 생략")
+            return
+        
+        tmp_file = self.history_file.with_suffix(".json.tmp")
         try:
-            with open(self.history_file, 'w', encoding='utf-8') as f:
-                json.dump(merged, f, indent=2, ensure_ascii=False)
+            with open(tmp_file, 'wb') as f:
+                f.write(_dumps(merged))
+                f.flush()
+                os.fsync(f.fileno())  # 교체 전에 내용이 디스크에 있도록 보장
+            os.replace(tmp_file, self.history_file)
+            self._history_cache = merged
         except Exception as e:
             print(f"❌ 저장 실패: {e}")
+            try:
+                tmp_file.unlink(missing_ok=True)  # 실패한 임시 파일이 data/에 남아 커밋되지 않도록
+            except OSError:
+                pass
     
     def append_log(self, hotels: List[Dict], prev_count: int = 0) -> None:
         """
@@ -77,9 +122,10 @@ class HotelStorage:
         """
         is_partial = prev_count > 0 and len(hotels) < prev_count * 0.5
         
+        now = datetime.now()  # date/timestamp가 같은 시각을 가리키도록 1회만 조회
         log_entry = {
-            "date": datetime.now().strftime("%Y-%m-%d"),
-            "timestamp": datetime.now().isoformat(),
+            "date": now.strftime("%Y-%m-%d"),
+            "timestamp": now.isoformat(),
             "hotels": hotels,
         }
         if is_partial:
@@ -87,9 +133,10 @@ class HotelStorage:
             print(f"⚠️ 부분 수집 감지: {len(hotels)}개 (이전: {prev_count}개) → 로그에 partial 마킹")
         
         try:
-            with open(self.log_file, 'a', encoding='utf-8') as f:
-                f.write(json.dumps(log_entry, ensure_ascii=False) + '\n')
+            with open(self.log_file, 'ab') as f:
+                f.write(_dumps(log_entry) + b'\n')
             self._logs_cache = None  # 캐시 무효화
+            self._code_index = None
         except Exception as e:
             print(f"⚠️ 로그 저장 실패: {e}")
     
@@ -103,16 +150,16 @@ class HotelStorage:
         Returns:
             [{"date": "2026-01-01", "hotels": [...]}, ...]
         """
+        if self._logs_cache is None and days is not None and days > 0:
+            return self._load_log_tail(days)
+        
         if self._logs_cache is None:
             if not self.log_file.exists():
                 return []
             
-            logs = []
             try:
-                with open(self.log_file, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        if line.strip():
-                            logs.append(json.loads(line))
+                # 파일을 한 번에 bytes로 읽고 줄 단위로 파싱 (orjson 우선)
+                logs = [_loads(line) for line in self.log_file.read_bytes().splitlines() if line.strip()]
             except Exception as e:
                 print(f"⚠️ 로그 로드 실패: {e}")
                 return []
@@ -125,6 +172,18 @@ class HotelStorage:
         
         return logs
     
+    def _load_log_tail(self, days: int) -> List[Dict]:
+        """마지막 days줄만 파싱 (전체 캐시가 없을 때, 캐싱하지 않음)"""
+        if not self.log_file.exists():
+            return []
+        try:
+            with open(self.log_file, 'rb') as f:
+                tail = deque((line for line in f if line.strip()), maxlen=days)
+            return [_loads(line) for line in tail]
+        except Exception as e:
+            print(f"⚠️ 로그 로드 실패: {e}")
+            return []
+    
     def get_all_time_low(self, hotel_code: str, exclude_date: str = None) -> Optional[Dict]:
         """
         특정 호텔의 역대 최저가 조회 (특정 날짜 제외)
@@ -139,28 +198,60 @@ class HotelStorage:
         Returns:
             {"price": 280, "date": "2026-01-15", "earliest": "2026-03-01"} or None
         """
-        logs = self.load_logs()
-        best = None
+        return self.get_all_time_lows([hotel_code], exclude_date).get(hotel_code)
+    
+    def _get_code_index(self) -> Dict[str, List[Dict]]:
+        """
+        호텔 코드별 가격 이력 인덱스 (로그 1회 순회 후 캐싱)
         
-        for log in logs:
-            log_date = log.get("date")
-            if exclude_date and log_date == exclude_date:
-                continue
-            # partial 로그는 신뢰할 수 없으므로 건너뜀
+        partial 로그는 제외, 같은 날짜에 같은 호텔은 첫 항목만 사용.
+        """
+        if self._code_index is not None:
+            return self._code_index
+        
+        index = defaultdict(list)
+        for log in self.load_logs():
             if log.get("partial"):
                 continue
-            
+            log_date = log.get("date")
+            seen = set()
             for hotel in log.get("hotels", []):
-                if hotel.get("code") == hotel_code:
-                    p = hotel.get("price")
-                    if p is not None:
-                        if best is None or p < best["price"]:
-                            best = {
-                                "price": p,
-                                "date": log_date,
-                                "earliest": hotel.get("earliest"),
-                            }
-                    break  # 같은 날짜에 같은 호텔은 1개
+                code = hotel.get("code")
+                if code in seen:
+                    continue
+                seen.add(code)
+                index[code].append({
+                    "date": log_date,
+                    "price": hotel.get("price"),
+                    "earliest": hotel.get("earliest"),
+                    "credit": hotel.get("credit"),
+                })
+        
+        if self._logs_cache is not None:  # 로드 실패 시에는 캐싱하지 않음
+            self._code_index = index
+        return index
+    
+    def get_all_time_lows(self, hotel_codes: List[str], exclude_date: str = None) -> Dict[str, Optional[Dict]]:
+        """
+        여러 호텔의 역대 최저가 조회 (코드별 인덱스 사용)
+        
+        get_all_time_low와 같은 규칙 (partial 로그/exclude_date 제외, 같은 가격이면 이른 날짜 유지).
+        
+        Returns:
+            {hotel_code: {"price": ..., "date": ..., "earliest": ...} or None}
+        """
+        index = self._get_code_index()
+        best = {}
+        
+        for code in hotel_codes:
+            low = None
+            for entry in index.get(code, ()):
+                if exclude_date and entry["date"] == exclude_date:
+                    continue
+                p = entry["price"]
+                if p is not None and (low is None or p < low["price"]):
+                    low = {"price": p, "date": entry["date"], "earliest": entry["earliest"]}
+            best[code] = low
         
         return best
     
@@ -174,24 +265,22 @@ class HotelStorage:
         Returns:
             [{"date": "2026-01-01", "price": 311, "earliest": "..."}, ...]
         """
-        logs = self.load_logs(days=None)
-        history = []
-        
-        for log in logs:
-            # partial 로그 건너뜀
-            if log.get("partial"):
-                continue
-            for hotel in log.get("hotels", []):
-                if hotel.get("code") == hotel_code:
-                    history.append({
-                        "date": log["date"],
-                        "price": hotel.get("price"),
-                        "earliest": hotel.get("earliest"),
-                        "credit": hotel.get("credit")
-                    })
-                    break
+        history = self._get_code_index().get(hotel_code, [])
         
         if days is not None and len(history) > days:
             history = history[-days:]
         
-        return history
+        return [dict(entry) for entry in history]  # 인덱스 보호용 사본
+    
+    def get_price_rows(self) -> List[Dict]:
+        """
+        전체 가격 이력을 평탄한 행 목록으로 반환 (대시보드 DataFrame용)
+        
+        Returns:
+            [{"code": "...", "date": "2026-01-01", "price": 311, "earliest": "...", "credit": 100}, ...]
+        """
+        return [
+            {"code": code, **entry}
+            for code, entries in self._get_code_index().items()
+            for entry in entries
+        ]
@@ -2,11 +2,13 @@
 한국 FHR 호텔 가격 대시보드 - 개선 버전 (그리드 레이아웃)
 """
 
+import json
 import streamlit as st
 import plotly.graph_objects as go
 import pandas as pd
+import numpy as np
 from storage import HotelStorage
-from datetime import datetime
+from datetime import date, datetime, timedelta
 
 st.set_page_config(
     page_title="FHR 호텔 최저가",
@@ -15,7 +17,7 @@ st.set_page_config(
 )
 
 # CSS - 그리드 레이아웃
-st.markdown("""
+PAGE_CSS = """
 <style>
 @import url("https://cdn.jsdelivr.net/gh/orioncactus/pretendard@v1.3.8/dist/web/static/pretendard.css");
 html, body, [class*="css"] { 
@@ -45,6 +47,17 @@ h3 {
     font-weight: 600;
 }
 
+/* 호텔 카드 그리드 (3열, 좁은 화면은 1열) */
+.hotel-grid {
+    display: grid;
+    grid-template-columns: repeat(3, minmax(0, 1fr));
+    gap: 16px;
+}
+
+@media (max-width: 640px) {
+    .hotel-grid { grid-template-columns: 1fr; }
+}
+
 /* 호텔 카드 */
 .hotel-card {
     background: linear-gradient(135deg, rgba(102, 126, 234, 0.1) 0%, rgba(118, 75, 162, 0.1) 100%);
@@ -127,20 +140,283 @@ section[data-testid="stSidebar"] > div {
     padding-top: 2rem;
 }
 </style>
-""", unsafe_allow_html=True)
+"""
+st.markdown(PAGE_CSS, unsafe_allow_html=True)
 
 # 데이터 로드
 @st.cache_data(ttl=3600)
 def load_data():
     storage = HotelStorage(base_dir="data")
     history = storage.load_history()
-    logs = storage.load_logs()
-    return history, logs
+    logs = storage.load_logs(days=1)  # 이력 존재 여부만 확인 (마지막 줄만 파싱)
+    # 호텔명 → code (이름이 겹치면 먼저 나온 code 유지)
+    name_to_code = {info["name"]: code for code, info in reversed(history.items())}
+    hotel_names = sorted(info["name"] for info in history.values())
+    return history, logs, name_to_code, hotel_names
+
+@st.cache_data(ttl=3600)
+def load_hotels_df():
+    """현재 가격 목록 DataFrame (rerun마다 다시 만들지 않도록 캐싱)"""
+    history, *_ = load_data()
+    df = (
+        pd.DataFrame.from_dict(history, orient="index")
+        .reindex(columns=["name", "price", "earliest", "credit", "all_time_low"])
+        .rename_axis("code")
+        .reset_index()
+    )
+    df["earliest"] = df["earliest"].fillna("")
+    # 빈 값이 있으면 float64가 되므로 채운 뒤 정수로 되돌림 ("$100.0" 표시 방지)
+    df["credit"] = df["credit"].fillna(100).astype("int64")
+    df["all_time_low"] = df["all_time_low"].fillna(df["price"]).astype("int64")
+    df["is_lowest"] = df["price"].to_numpy() == df["all_time_low"].to_numpy()
+    # 기본 정렬(가격 낮은순)로 미리 정렬 → 필터링 후에도 순서 유지되므로 재정렬 불필요
+    return df.sort_values("price", kind="mergesort", ignore_index=True)
+
+@st.cache_data(ttl=3600)
+def load_price_log_df():
+    """가격 이력 전체를 (code, date, price, earliest, credit) DataFrame으로 (partial 로그 제외)"""
+    storage = HotelStorage(base_dir="data")
+    return pd.DataFrame(
+        storage.get_price_rows(),
+        columns=["code", "date", "price", "earliest", "credit"],
+    )
+
+CHART_MAX_POINTS = 500  # 차트로 보낼 최대 점 수 (초과 시 LTTB 다운샘플링)
+CHART_MARKER_MAX_POINTS = 60  # 이보다 점이 많으면 마커 없이 선만 표시
+
+def lttb_indices(values, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets로 남길 점의 인덱스 (x는 일 단위 등간격으로 간주)
+    
+    첫/마지막 점은 항상 유지, 가운데 구간마다 모양을 가장 잘 살리는 점 하나를 선택.
+    """
+    y = np.asarray(values, dtype=float)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    
+    x = np.arange(n, dtype=float)
+    bucket = (n - 2) / (n_out - 2)
+    picked = np.empty(n_out, dtype=int)
+    picked[0], picked[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start = int(i * bucket) + 1
+        end = int((i + 1) * bucket) + 1
+        if i == n_out - 3:
+            next_start, next_end = n - 1, n
+        else:
+            next_start, next_end = end, min(int((i + 2) * bucket) + 1, n)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(area.argmax())
+        picked[i + 1] = a
+    return picked
+
+def select_price_history(hotel_code: str, period_days):
+    """
+    캐시된 이력에서 호텔의 최근 period_days일 (date, price) 구간 선택
+    
+    마지막 수집일 기준 달력 날짜로 자름 (수집 누락/하루 여러 번 수집이 있어도 기간이 라벨과 일치).
+    """
+    log_df = load_price_log_df()
+    price_history = log_df.loc[log_df["code"] == hotel_code, ["date", "price"]]
+    if period_days is not None and len(price_history) > 0:
+        dates = price_history["date"].to_numpy()  # 로그 순서 = 날짜 오름차순
+        cutoff = (date.fromisoformat(dates[-1]) - timedelta(days=period_days - 1)).isoformat()
+        price_history = price_history.iloc[np.searchsorted(dates, cutoff):]
+    return price_history
+
+@st.cache_data(ttl=3600)
+def build_price_chart_json(hotel_code: str, period_days, title: str) -> str:
+    """가격 추이 차트 JSON (Figure 조립/직렬화를 (호텔, 기간)별로 캐싱)"""
+    price_history = select_price_history(hotel_code, period_days)
+    prices = price_history["price"].to_numpy()
+    chart_points = price_history.iloc[lttb_indices(prices, CHART_MAX_POINTS)]
+    
+    # Plotly 차트
+    fig = go.Figure()
+    
+    # 채우기 기준선 (0까지 채우지 않도록 최저가 아래에 숨긴 선)
+    baseline = np.nanmin(prices) * 0.9
+    fig.add_trace(go.Scattergl(
+        x=chart_points["date"],
+        y=np.full(len(chart_points), baseline),
+        mode='lines',
+        line=dict(width=0),
+        hoverinfo='skip',
+        showlegend=False
+    ))
+    
+    # 메인 라인
+    fig.add_trace(go.Scattergl(
+        x=chart_points["date"],
+        y=chart_points["price"],
+        mode='lines+markers' if len(chart_points) <= CHART_MARKER_MAX_POINTS else 'lines',
+        name='가격',
+        line=dict(color='#667eea', width=4),
+        marker=dict(size=10, color='#764ba2'),
+        hovertemplate="<b>%{x}</b><br>가격: $%{y}<extra></extra>",
+        fill='tonexty',
+        fillcolor='rgba(102, 126, 234, 0.1)'
+    ))
+    
+    # 역대 최저가 라인
+    all_time_low = load_data()[0][hotel_code]["all_time_low"]
+    fig.add_hline(
+        y=all_time_low,
+        line_dash="dash",
+        line_color="#ff4757",
+        line_width=3,
+        annotation_text=f"🔥 역대 최저 ${all_time_low}",
+        annotation_position="right",
+        annotation_font_size=14,
+        annotation_font_color="#ff4757"
+    )
+    
+    # 평균 라인
+    avg_price = np.nanmean(prices)
+    fig.add_hline(
+        y=avg_price,
+        line_dash="dot",
+        line_color="#ffd43b",
+        line_width=2,
+        annotation_text=f"📊 평균 ${avg_price:.0f}",
+        annotation_position="left",
+        annotation_font_size=12,
+        annotation_font_color="#ffd43b"
+    )
+    
+    fig.update_layout(
+        title={
+            'text': title,
+            'font': {'size': 22, 'color': '#fff', 'family': 'Pretendard'}
+        },
+        xaxis_title="날짜",
+        yaxis_title="가격 ($)",
+        height=500,
+        template="plotly_dark",
+        hovermode="x unified",
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+    )
+    
+    return fig.to_json()
+
+CARD_COLUMNS = ["name", "price", "earliest", "credit", "is_lowest"]  # hotel_card_html 인자 순서
+
+def hotel_card_html(name, price, earliest, credit, is_lowest) -> str:
+    """호텔 카드 한 칸의 HTML (빈 줄이 없어야 markdown이 HTML 블록으로 유지)"""
+    price_class = "price-lowest" if is_lowest else "price-same"
+    icon = "🔥" if is_lowest else "🏨"
+    lowest_badge = '<div class="lowest-badge">✨ 역대 최저가!</div>' if is_lowest else ""
+    return (
+        '<div class="hotel-card">'
+        f'<div class="hotel-name">{icon} {name}</div>'
+        f'<div class="price-big {price_class}">${price}</div>'
+        '<div>'
+        f'<span class="info-badge">📅 {earliest if earliest else "날짜 미정"}</span> '
+        f'<span class="info-badge">💳 ${credit}</span>'
+        '</div>'
+        f'{lowest_badge}'
+        '</div>'
+    )
 
 # 메인
 st.title("🏨 FHR 호텔 최저가 트래커")
 
-history, logs = load_data()
+@st.fragment
+def render_price_chart(logs: list, hotel_names: list, name_to_code: dict):
+    """가격 추이 탭 (호텔/기간 변경 시 이 부분만 다시 실행)"""
+    st.subheader("📈 가격 추이 분석")
+    
+    if not logs:
+        st.info("📊 아직 이력 데이터가 없습니다. 내일부터 차트가 표시됩니다.")
+    else:
+        col1, col2 = st.columns([2, 1])
+        
+        # 호텔 선택
+        with col1:
+            selected_hotel = st.selectbox(
+                "🏨 호텔 선택", 
+                hotel_names, 
+                key="price_chart_hotel"
+            )
+        
+        # 기간 선택
+        with col2:
+            period_options = {
+                "최근 7일": 7,
+                "최근 14일": 14,
+                "최근 30일": 30,
+                "최근 90일": 90,
+                "최근 6개월": 180,
+                "최근 1년": 365,
+                "📊 전체 기간": None
+            }
+            selected_period = st.selectbox(
+                "기간", 
+                list(period_options.keys()), 
+                index=2,
+                key="price_chart_period"
+            )
+            period_days = period_options[selected_period]
+        
+        # 해당 호텔의 code 찾기
+        hotel_code = name_to_code.get(selected_hotel)
+        
+        if hotel_code:
+            price_history = select_price_history(hotel_code, period_days)
+            
+            if len(price_history) < 2:
+                st.info("📊 차트를 표시하려면 최소 2일 이상의 데이터가 필요합니다.")
+            else:
+                prices = price_history["price"].to_numpy()  # 통계는 NumPy 배열로 1회 변환
+                avg_price = np.nanmean(prices)
+                
+                # Plotly 차트 (점이 많으면 다운샘플링, 캐시된 JSON 사용)
+                st.plotly_chart(
+                    json.loads(build_price_chart_json(hotel_code, period_days, f"{selected_hotel} - {selected_period}")),
+                    use_container_width=True,
+                )
+                
+                # 통계 카드
+                st.markdown("### 📊 기간 통계")
+                col1, col2, col3, col4 = st.columns(4)
+                
+                with col1:
+                    st.metric("현재", f"${prices[-1]}")
+                
+                with col2:
+                    st.metric("평균", f"${avg_price:.0f}")
+                
+                with col3:
+                    st.metric("최저", f"${np.nanmin(prices)}")
+                
+                with col4:
+                    st.metric("최고", f"${np.nanmax(prices)}")
+                
+                # 가격 변동
+                if len(prices) > 1:
+                    first_price, last_price = prices[0], prices[-1]
+                    price_change = last_price - first_price
+                    change_pct = (price_change / first_price * 100) if first_price != 0 else 0
+                    
+                    change_color = "🔻" if price_change < 0 else "🔺" if price_change > 0 else "➡️"
+                    change_text = f"{change_color} 기간 내 변동: ${price_change:+.0f} ({change_pct:+.1f}%)"
+                    
+                    if price_change < 0:
+                        st.success(change_text)
+                    elif price_change > 0:
+                        st.error(change_text)
+                    else:
+                        st.info(change_text)
+
+history, logs, name_to_code, hotel_names = load_data()
 
 if not history:
     st.warning("⚠️ 데이터가 없습니다.")
@@ -150,18 +426,7 @@ if not history:
 st.markdown("### 📊 전체 현황")
 col1, col2, col3, col4 = st.columns(4)
 
-hotels_df = pd.DataFrame([
-    {
-        "code": code,
-        "name": info["name"],
-        "price": info["price"],
-        "earliest": info.get("earliest", ""),
-        "credit": info.get("credit", 100),
-        "all_time_low": info.get("all_time_low", info["price"]),
-        "is_lowest": info["price"] == info.get("all_time_low", info["price"])
-    }
-    for code, info in history.items()
-])
+hotels_df = load_hotels_df()
 
 with col1:
     st.metric("📍 총 호텔", f"{len(hotels_df)}개")
@@ -171,7 +436,7 @@ with col2:
     st.metric("💵 평균", f"${avg_price:.0f}")
 
 with col3:
-    lowest_count = sum(hotels_df["is_lowest"])
+    lowest_count = int(hotels_df["is_lowest"].sum())
     st.metric("🔥 최저", f"{lowest_count}개")
 
 with col4:
@@ -219,26 +484,23 @@ show_lowest_only = st.sidebar.checkbox("🔥 역대최저가만 보기")
 tab1, tab2 = st.tabs(["💰 호텔 목록", "📈 가격 추이"])
 
 with tab1:
-    # 필터링
-    filtered_df = hotels_df.copy()
+    # 필터링 (조건을 하나의 mask로 합쳐 한 번만 슬라이싱)
+    mask = (hotels_df["price"] >= price_range[0]) & (hotels_df["price"] <= price_range[1])
     
     if selected_city != "전체":
         city_keyword = city_map[selected_city]
-        filtered_df = filtered_df[filtered_df["name"].str.contains(city_keyword, case=False)]
-    
-    filtered_df = filtered_df[
-        (filtered_df["price"] >= price_range[0]) & 
-        (filtered_df["price"] <= price_range[1])
-    ]
+        mask &= hotels_df["name"].str.contains(city_keyword, case=False, regex=False)
     
     if show_lowest_only:
-        filtered_df = filtered_df[filtered_df["is_lowest"]]
+        mask &= hotels_df["is_lowest"]
+    
+    filtered_df = hotels_df[mask]
     
     # 정렬
     sort_col, sort_asc = sort_options[selected_sort]
     if sort_col == "is_lowest":
-        filtered_df = filtered_df[filtered_df["is_lowest"]].sort_values("price")
-    else:
+        filtered_df = filtered_df[filtered_df["is_lowest"]]  # 이미 가격순
+    elif sort_col != "price" or not sort_asc:
         filtered_df = filtered_df.sort_values(sort_col, ascending=sort_asc)
     
     st.subheader(f"총 {len(filtered_df)}개 호텔")
@@ -246,181 +508,13 @@ with tab1:
     if len(filtered_df) == 0:
         st.info("🔍 필터 조건에 맞는 호텔이 없습니다.")
     else:
-        # 3열 그리드로 호텔 카드 표시
-        hotels_list = filtered_df.to_dict('records')
-        
-        # 3개씩 묶어서 row 생성
-        for i in range(0, len(hotels_list), 3):
-            cols = st.columns(3)
-            
-            for j, col in enumerate(cols):
-                if i + j < len(hotels_list):
-                    hotel = hotels_list[i + j]
-                    is_lowest = hotel["is_lowest"]
-                    price_class = "price-lowest" if is_lowest else "price-same"
-                    icon = "🔥" if is_lowest else "🏨"
-                    
-                    with col:
-                        st.markdown(f"""
-                        <div class="hotel-card">
-                            <div class="hotel-name">{icon} {hotel['name']}</div>
-                            <div class="price-big {price_class}">${hotel['price']}</div>
-                            <div>
-                                <span class="info-badge">📅 {hotel['earliest'] if hotel['earliest'] else '날짜 미정'}</span>
-                                <span class="info-badge">💳 ${hotel['credit']}</span>
-                            </div>
-                            {f'<div class="lowest-badge">✨ 역대 최저가!</div>' if is_lowest else ''}
-                        </div>
-                        """, unsafe_allow_html=True)
+        # 3열 그리드로 호텔 카드 표시 (카드 전체를 한 번의 markdown으로 전송)
+        rows = filtered_df[CARD_COLUMNS].itertuples(index=False, name=None)
+        cards_html = "".join(hotel_card_html(*row) for row in rows)
+        st.markdown(f'<div class="hotel-grid">{cards_html}</div>', unsafe_allow_html=True)
 
 with tab2:
-    st.subheader("📈 가격 추이 분석")
-    
-    if not logs:
-        st.info("📊 아직 이력 데이터가 없습니다. 내일부터 차트가 표시됩니다.")
-    else:
-        col1, col2 = st.columns([2, 1])
-        
-        # 호텔 선택
-        with col1:
-            hotel_names = sorted([info["name"] for info in history.values()])
-            selected_hotel = st.selectbox(
-                "🏨 호텔 선택", 
-                hotel_names, 
-                key="price_chart_hotel"
-            )
-        
-        # 기간 선택
-        with col2:
-            period_options = {
-                "최근 7일": 7,
-                "최근 14일": 14,
-                "최근 30일": 30,
-                "최근 90일": 90,
-                "최근 6개월": 180,
-                "최근 1년": 365,
-                "📊 전체 기간": None
-            }
-            selected_period = st.selectbox(
-                "기간", 
-                list(period_options.keys()), 
-                index=2,
-                key="price_chart_period"
-            )
-            period_days = period_options[selected_period]
-        
-        # 해당 호텔의 code 찾기
-        hotel_code = None
-        for code, info in history.items():
-            if info["name"] == selected_hotel:
-                hotel_code = code
-                break
-        
-        if hotel_code:
-            storage = HotelStorage(base_dir="data")
-            all_history = storage.get_price_history_for_hotel(hotel_code, days=None)
-            
-            if period_days is not None and len(all_history) > period_days:
-                price_history = all_history[-period_days:]
-            else:
-                price_history = all_history
-            
-            if len(price_history) < 2:
-                st.info("📊 차트를 표시하려면 최소 2일 이상의 데이터가 필요합니다.")
-            else:
-                # 차트 데이터
-                dates = [h["date"] for h in price_history]
-                prices = [h["price"] for h in price_history]
-                
-                # Plotly 차트
-                fig = go.Figure()
-                
-                # 메인 라인
-                fig.add_trace(go.Scatter(
-                    x=dates,
-                    y=prices,
-                    mode='lines+markers',
-                    name='가격',
-                    line=dict(color='#667eea', width=4),
-                    marker=dict(size=10, color='#764ba2'),
-                    hovertemplate="<b>%{x}</b><br>가격: $%{y}<extra></extra>",
-                    fill='tozeroy',
-                    fillcolor='rgba(102, 126, 234, 0.1)'
-                ))
-                
-                # 역대 최저가 라인
-                all_time_low = history[hotel_code]["all_time_low"]
-                fig.add_hline(
-                    y=all_time_low,
-                    line_dash="dash",
-                    line_color="#ff4757",
-                    line_width=3,
-                    annotation_text=f"🔥 역대 최저 ${all_time_low}",
-                    annotation_position="right",
-                    annotation_font_size=14,
-                    annotation_font_color="#ff4757"
-                )
-                
-                # 평균 라인
-                avg_price = sum(prices) / len(prices)
-                fig.add_hline(
-                    y=avg_price,
-                    line_dash="dot",
-                    line_color="#ffd43b",
-                    line_width=2,
-                    annotation_text=f"📊 평균 ${avg_price:.0f}",
-                    annotation_position="left",
-                    annotation_font_size=12,
-                    annotation_font_color="#ffd43b"
-                )
-                
-                period_text = selected_period
-                fig.update_layout(
-                    title={
-                        'text': f"{selected_hotel} - {period_text}",
-                        'font': {'size': 22, 'color': '#fff', 'family': 'Pretendard'}
-                    },
-                    xaxis_title="날짜",
-                    yaxis_title="가격 ($)",
-                    height=500,
-                    template="plotly_dark",
-                    hovermode="x unified",
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    paper_bgcolor='rgba(0,0,0,0)',
-                )
-                
-                st.plotly_chart(fig, use_container_width=True)
-                
-                # 통계 카드
-                st.markdown("### 📊 기간 통계")
-                col1, col2, col3, col4 = st.columns(4)
-                
-                with col1:
-                    st.metric("현재", f"${prices[-1]}")
-                
-                with col2:
-                    st.metric("평균", f"${avg_price:.0f}")
-                
-                with col3:
-                    st.metric("최저", f"${min(prices)}")
-                
-                with col4:
-                    st.metric("최고", f"${max(prices)}")
-                
-                # 가격 변동
-                if len(prices) > 1:
-                    price_change = prices[-1] - prices[0]
-                    change_pct = (price_change / prices[0] * 100) if prices[0] != 0 else 0
-                    
-                    change_color = "🔻" if price_change < 0 else "🔺" if price_change > 0 else "➡️"
-                    change_text = f"{change_color} 기간 내 변동: ${price_change:+.0f} ({change_pct:+.1f}%)"
-                    
-                    if price_change < 0:
-                        st.success(change_text)
-                    elif price_change > 0:
-                        st.error(change_text)
-                    else:
-                        st.info(change_text)
+    render_price_chart(logs, hotel_names, name_to_code)
 
 # 푸터
 st.markdown("---")